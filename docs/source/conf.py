@@ -24,6 +24,7 @@ exclude_patterns = []
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#options-for-html-output
 import os
 import sys
+from pathlib import Path
 # The absolute path to your project's root directory
 sys.path.insert(0, os.path.abspath('../../'))
 
@@ -39,17 +40,16 @@ html_theme = "sphinx_rtd_theme"
 html_static_path = ['_static']
 autoapi_dirs = ['../../src']
 
+# Resolved once, sphinx runs from the docs directory
+INDEX_HTML = Path("build", "index.html").resolve()
+
 def post_process_html(app, exception):
     print("called 1")
     toAdd ='<base href="/PythonPID/">'
     toSearch = '<meta charset="utf-8" /><meta name="viewport" content="width=device-width, initial-scale=1" />'
     if exception is None and app.builder.name == 'html':
-        with open(os.path.abspath(os.path.join("build", "index.html")), "r+", encoding='utf-8') as f:
-            content = f.read()
-            newContent = content.replace(toSearch, toSearch+'\n  '+toAdd)
-            f.seek(0)
-            f.truncate()
-            f.write(newContent)
+        content = INDEX_HTML.read_text(encoding='utf-8')
+        INDEX_HTML.write_text(content.replace(toSearch, toSearch+'\n  '+toAdd), encoding='utf-8')
         print("Changed index.html to work with github pages")
         
 def  setup(app):
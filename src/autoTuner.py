@@ -1,6 +1,5 @@
 from PythonPID.src.pid_controller import PID_Controller
 import time
-import math
 
 
 class AdaptivePID(PID_Controller):
@@ -8,16 +7,21 @@ class AdaptivePID(PID_Controller):
     PID controller that can automatically tune itself based on live response.
     """
 
+    __slots__ = ('_tune_rate', '_error_threshold', '_prev_error_pos', '_oscillation_counter')
+
+    # gains change every tick, keep them kernel arguments
+    _specialize_gains = False
+
     def __init__(self, *args, tune_rate=0.01, error_threshold=0.05, **kwargs):
         super().__init__(*args, **kwargs)
         self._tune_rate = tune_rate
         self._error_threshold = error_threshold
-        self._prev_error_sign = None
+        self._prev_error_pos = None
         self._oscillation_counter = 0
 
-    def compute(self, current_value: float, target_value: float) -> float:
+    def compute(self, current_value: float, target_value: float, dt: float = None) -> float:
         # Run the normal PID computation
-        output = super().compute(current_value, target_value)
+        output = super().compute(current_value, target_value, dt)
 
         # Run live tuning logic
         self._auto_tune(current_value, target_value)
@@ -31,53 +35,76 @@ class AdaptivePID(PID_Controller):
         error = target_value - current_value
 
         # Detect oscillations by error sign changes
-        sign = math.copysign(1, error)
-        if self._prev_error_sign is not None and sign != self._prev_error_sign:
+        curr_pos = error >= 0.0
+        if self._prev_error_pos is not None and curr_pos != self._prev_error_pos:
             self._oscillation_counter += 1
-        self._prev_error_sign = sign
+        self._prev_error_pos = curr_pos
 
         # Simple heuristic adjustments
-        if abs(error) > self._error_threshold:
+        abs_error = -error if error < 0.0 else error
+        if abs_error > self._error_threshold:
             # System is too sluggish → increase Kp
-            self._kp += self._tune_rate * abs(error)
-        elif self._oscillation_counter > 3:
-            # Too many oscillations → back off Kp or increase D
-            self._kp *= 0.95
-            self._kd += self._tune_rate * 0.1
-            self._oscillation_counter = 0
-
-        # Optional: adjust Ki based on steady-state error
-        if abs(error) < self._error_threshold:
+            self._kp += self._tune_rate * abs_error
+        else:
+            # Optional: adjust Ki based on steady-state error
             self._ki += self._tune_rate * 0.001
+            self._update_integral_limits()
+
+            if self._oscillation_counter > 3:
+                # Too many oscillations → back off Kp or increase D
+                self._kp *= 0.95
+                self._kd += self._tune_rate * 0.1
+                self._oscillation_counter = 0
 
 
 
 # MAIN TEST SIMULATION-
 if __name__ == "__main__":
+    import argparse
     import random
+    import numpy as np
+    parser = argparse.ArgumentParser(description="Adaptive PID simulation")
+    parser.add_argument("--realtime", action="store_true", help="sleep dt per step and let the controller measure time")
+    parser.add_argument("--repeat", type=int, default=1, help="run the simulation N times and report the fastest loop")
+    args = parser.parse_args()
+
     print("Starting Adaptive PID simulation...\n")
-    pid = AdaptivePID(kp=0.5, ki=0.05, kd=0.02, min_output=-100, max_output=100, tau=0.05)
 
     target = 10.0
-    process_value = 0.0
     dt = 0.05
+    n_steps = 200
+    step_dt = None if args.realtime else dt
 
-    print(f"{'Step':>4} | {'Value':>7} | {'Cmd':>7} | {'Kp':>6} | {'Ki':>6} | {'Kd':>6}")
-    print("-" * 45)
+    # Preallocated log, printed after the loop so formatting isn't measured
+    log = np.empty((n_steps, 6))
+
+    loop_times = []
+    for _ in range(max(args.repeat, 1)):
+        pid = AdaptivePID(kp=0.5, ki=0.05, kd=0.02, min_output=-100, max_output=100, tau=0.05)
+        process_value = 0.0
 
-    for step in range(200):
-        cmd = pid.compute(process_value, target)
+        start = time.perf_counter()
+        for step in range(n_steps):
+            cmd = pid.compute(process_value, target, step_dt)
 
-        # Simple process model: inertia + noise
-        process_value += 0.1 * cmd * dt
-        process_value += random.uniform(-0.02, 0.02)
+            # Simple process model: inertia + noise
+            process_value += 0.1 * cmd * dt
+            process_value += random.uniform(-0.02, 0.02)
 
-        if step % 10 == 0:
-            print(
-                f"{step:4d} | {process_value:7.3f} | {cmd:7.3f} | "
-                f"{pid._kp:6.3f} | {pid._ki:6.3f} | {pid._kd:6.3f}"
-            )
+            log[step] = (step, process_value, cmd, pid._kp, pid._ki, pid._kd)
 
-        time.sleep(dt)
+            if args.realtime:
+                time.sleep(dt)
+        loop_times.append(time.perf_counter() - start)
 
-    print("\nSimulation complete.")
\ No newline at end of file
+    print(f"{'Step':>4} | {'Value':>7} | {'Cmd':>7} | {'Kp':>6} | {'Ki':>6} | {'Kd':>6}")
+    print("-" * 45)
+    for step, value, cmd, kp, ki, kd in log[::10]:
+        print(
+            f"{int(step):4d} | {value:7.3f} | {cmd:7.3f} | "
+            f"{kp:6.3f} | {ki:6.3f} | {kd:6.3f}"
+        )
+
+    best = min(loop_times)
+    print(f"\nSimulation complete. Loop time: {best * 1e3:.3f} ms "
+          f"({best / n_steps * 1e6:.3f} us per step, best of {len(loop_times)})")
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+Cython build of the PID compute kernel.
+
+Compiles pid_cython.pyx into an extension module next to this file.
+pid_controller.py picks it up on import when the numba AOT module
+(build_pid_ext.py) isn't built. Use it on targets where numba isn't
+available or its import time is too long.
+
+Run:
+
+    python build_pid_cython.py build_ext --inplace
+"""
+import os
+
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+setup(
+    name='pid_cython',
+    ext_modules=cythonize(
+        [Extension('pid_cython', [os.path.join(here, 'pid_cython.pyx')])],
+        language_level=3,
+    ),
+)
@@ -0,0 +1,42 @@
+"""
+Ahead-of-time build of the PID compute kernel.
+
+Compiles the numba kernel from pid_controller.py into the extension module
+``pid_ext`` next to this file. pid_controller.py picks it up on import, so no
+JIT compilation happens at runtime and every tick has the same cost.
+The exported function works on a preallocated state array and does not
+allocate, which makes it usable in real-time loops.
+
+Run:
+
+    python build_pid_ext.py
+
+``pid_ext`` is a CPython extension. To drive the controller from C, keep one
+global PID_Controller in an embedded interpreter and expose a thin wrapper
+that forwards ``(r, y, dt)`` to its compute method, so the host only ever
+sees a ``double calculate_control(double r, double y, double dt)`` call.
+"""
+import os
+
+from numba.pycc import CC
+
+from pid_controller import _COMPUTE_KERNEL_SIGNATURE, _KERNEL_VERSION, _compute_kernel
+
+cc = CC('pid_ext')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+@cc.export('compute_pid', _COMPUTE_KERNEL_SIGNATURE)
+def compute_pid(kp, ki, kd, min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate, reset_delta,
+                state, current_value, target_value, dt):
+    return _compute_kernel(kp, ki, kd, min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate, reset_delta,
+                           state, current_value, target_value, dt)
+
+
+@cc.export('kernel_version', 'i8()')
+def kernel_version():
+    return _KERNEL_VERSION
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,10 +1,266 @@
-import time
+import functools
+import importlib
 import math
+import time
+import warnings
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:  # numba is optional, fall back to plain Python
+    _HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 """
 PID modeled after Matlab PID introduction
 https://youtu.be/wkfEZmsQqiA?si=G9xtIAdn5ta9msH8
 """
 
+# Layout of the controller state array shared with the compute kernel
+_S_INTEGRAL = 0
+_S_LAST_DERIVATIVE = 1
+_S_LAST_VALUE = 2
+_S_LAST_TARGET = 3
+_S_LAST_OUTPUT = 4
+_STATE_SIZE = 5
+
+# Derivative term limit and output slew rate (per second), as fractions of the output limits
+_DERIVATIVE_LIMIT_RATIO = 0.2
+_OUT_RATE_RATIO = 1.0
+
+
+@njit(inline='always', fastmath=True)
+def _pid_step(kp, ki, kd, min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate, reset_delta,
+              integral, last_derivative, last_value, last_target, last_output,
+              current_value, target_value, dt):
+    """
+    One PID step on scalar state, shared by the single and the batch kernel.
+
+    Written as straight-line arithmetic: every limit is a min/max pair and
+    the integral reset is a select, so there are no data dependent branches
+    and the batch loop can be vectorized by LLVM.
+
+    Returns:
+        tuple: ``(output, integral, filtered_derivative)`` with the updated
+        state values.
+    """
+    # Calculate error term
+    error = target_value - current_value
+
+    # --- Integral term ---
+
+    # reset integral if target has changed more then resetDelta
+    integral *= 0.5 if abs(last_target - target_value) > reset_delta else 1.0  # or = 0 for hard reset?
+
+    # clamp the integral so the i term alone can't exceed the output limits (anti-windup)
+    integral = min(max(integral + error * dt, i_min), i_max)
+
+    # --- Derivative term (with low-pass filter) ---
+
+    # derivative on measurement, filtered with a first-order low-pass (exponential smoothing)
+    derivative = -(current_value - last_value) / dt
+    filtered_derivative = alpha * last_derivative + (1 - alpha) * derivative
+
+    # Total PID output, derivative clamped to protect against noise / glitches
+    output = kp * error + ki * integral + kd * min(max(filtered_derivative, min_d), max_d)
+
+    # Clamp the output within limits
+    clamped_output = min(max(output, min_out), max_out)
+
+    # slew rate limiting
+    rate = (clamped_output - last_output) / dt
+    clamped_output = last_output + min(max(rate, -max_rate), max_rate) * dt
+
+    return clamped_output, integral, filtered_derivative
+
+
+# Eager float64 signature: int gains or inputs are converted at the call instead of
+# triggering a recompile, and the kernel is compiled (or loaded from cache) at import
+_COMPUTE_KERNEL_SIGNATURE = 'f8(f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8[::1], f8, f8, f8)'
+
+
+@njit(_COMPUTE_KERNEL_SIGNATURE, cache=True, fastmath=True)
+def _compute_kernel(kp, ki, kd, min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate, reset_delta,
+                    state, current_value, target_value, dt):
+    """
+    Compute one PID step and update the state array in place.
+
+    Args:
+        kp, ki, kd (float): PID gains.
+        min_out, max_out (float): Output limits.
+        alpha (float): Derivative filter smoothing factor ``tau / (tau + dt)``.
+        i_min, i_max (float): Integral limits (anti-windup).
+        min_d, max_d (float): Derivative limits.
+        max_rate (float): Maximum output change per second.
+        reset_delta (float): Target change that halves the integral.
+        state (np.ndarray): Controller state, see the ``_S_*`` indices.
+        current_value (float): The current process variable.
+        target_value (float): The desired set point.
+        dt (float): Time step since last update.
+
+    Returns:
+        float: The control command output.
+    """
+    output, integral, filtered_derivative = _pid_step(
+        kp, ki, kd, min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate, reset_delta,
+        state[_S_INTEGRAL], state[_S_LAST_DERIVATIVE], state[_S_LAST_VALUE],
+        state[_S_LAST_TARGET], state[_S_LAST_OUTPUT], current_value, target_value, dt)
+
+    # Update internal state
+    state[_S_INTEGRAL] = integral
+    state[_S_LAST_DERIVATIVE] = filtered_derivative
+    state[_S_LAST_VALUE] = current_value
+    state[_S_LAST_TARGET] = target_value
+    state[_S_LAST_OUTPUT] = output
+
+    return output
+
+
+@njit(parallel=True, fastmath=True)
+def _simulate_batch_kernel(kps, kis, kds, targets, min_out, max_out, tau, min_d, max_d,
+                           max_rate, reset_delta, initial_value, dt, n_steps, plant_fn):
+    """
+    Run independent closed loop rollouts, one per gain set, in parallel.
+
+    The controller state is kept as one array per state variable (structure
+    of arrays) instead of one object per controller.
+
+    Returns:
+        tuple: ``(values, commands)`` arrays of shape ``(N, n_steps)``.
+    """
+    n = kps.shape[0]
+    alpha = tau / (tau + dt)  # dt is constant, so is the filter factor
+    values = np.empty((n, n_steps))
+    commands = np.empty((n, n_steps))
+
+    integral = np.zeros(n)
+    last_derivative = np.zeros(n)
+    last_value = np.zeros(n)
+    last_target = np.zeros(n)
+    last_output = np.zeros(n)
+
+    # Rollouts don't interact, so each worker runs a whole trajectory
+    for i in prange(n):
+        value = initial_value
+        i_max = max_out / max(kis[i], 1e-12)
+        i_min = min_out / max(kis[i], 1e-12)
+        for t in range(n_steps):
+            output, integral[i], last_derivative[i] = _pid_step(
+                kps[i], kis[i], kds[i], min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate,
+                reset_delta, integral[i], last_derivative[i], last_value[i], last_target[i],
+                last_output[i], value, targets[i], dt)
+            last_value[i] = value
+            last_target[i] = targets[i]
+            last_output[i] = output
+
+            value = plant_fn(value, output, dt)
+            values[i, t] = value
+            commands[i, t] = output
+
+    return values, commands
+
+
+# Bump when the compute_pid signature or the state layout changes, so stale compiled kernels are ignored
+_KERNEL_VERSION = 1
+
+
+def _import_compiled_kernel(name):
+    """
+    Import compute_pid from a compiled kernel module next to this file.
+
+    Args:
+        name (str): Module name, ``pid_ext`` or ``pid_cython``.
+
+    Returns:
+        callable: The compiled compute_pid, or None if the module isn't built or is stale.
+    """
+    module = None
+    if __package__:
+        try:
+            module = importlib.import_module('.' + name, __package__)
+        except ImportError:
+            pass
+    if module is None:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            return None
+
+    version = getattr(module, 'kernel_version', None)
+    if version is None or version() != _KERNEL_VERSION:
+        warnings.warn(f"ignoring stale {name} kernel (built for an older pid_controller), rebuild it")
+        return None
+    return module.compute_pid
+
+
+# Prefer an ahead-of-time compiled kernel to skip JIT compilation:
+# numba AOT (see build_pid_ext.py), then Cython (see build_pid_cython.py)
+compute_pid = _import_compiled_kernel('pid_ext') or _import_compiled_kernel('pid_cython') or _compute_kernel
+
+# Plain Python kernel: indexing np.float64 scalars is slow there, so the state is a list of floats
+_PURE_PYTHON = compute_pid is _compute_kernel and not _HAVE_NUMBA
+
+
+_SPECIALIZED_KERNEL_SIGNATURE = 'f8(f8, f8, f8, f8, f8, f8[::1], f8, f8, f8, f8)'
+
+
+@functools.lru_cache(maxsize=None)
+def _build_specialized_kernel(min_out, max_out, min_d, max_d, max_rate, reset_delta, gains=None, sample_time=None,
+                              alpha=None):
+    """
+    Build a compute kernel with the given settings closed over as constants.
+
+    The kernel calls _compute_kernel, which numba inlines, so the compiler can
+    fold the constants and fuse the arithmetic. Kernels are cached on their
+    constants: controllers with equal settings share one compile.
+
+    Args:
+        min_out, max_out, min_d, max_d, max_rate, reset_delta (float): Limits, as in _compute_kernel.
+        gains (tuple): ``(kp, ki, kd, i_min, i_max)`` to bake in, or None to keep them
+            arguments (e.g. for AdaptivePID, which tunes them live).
+        sample_time (float): Fixed time step to bake in together with the filter factor
+            ``alpha`` (needs gains). The kernel is then only valid for ``dt == sample_time``.
+        alpha (float): Filter factor for sample_time.
+
+    Returns:
+        callable: ``kernel(kp, ki, kd, i_min, i_max, state, current_value, target_value, dt, alpha) -> float``
+        which updates the state array in place. Arguments baked in as constants are ignored.
+    """
+    if gains is None:
+        @njit(_SPECIALIZED_KERNEL_SIGNATURE, fastmath=True)
+        def kernel(kp, ki, kd, i_min, i_max, state, current_value, target_value, dt, alpha):
+            return _compute_kernel(kp, ki, kd, min_out, max_out, alpha, i_min, i_max, min_d, max_d, max_rate,
+                                   reset_delta, state, current_value, target_value, dt)
+        return kernel
+
+    static_kp, static_ki, static_kd, static_i_min, static_i_max = gains
+    if static_ki == 0.0:
+        # the integral never reaches the output, so anti-windup is moot: unbounded limits fold the clamp away
+        static_i_min, static_i_max = -math.inf, math.inf
+
+    if sample_time is None:
+        @njit(_SPECIALIZED_KERNEL_SIGNATURE, fastmath=True)
+        def kernel(kp, ki, kd, i_min, i_max, state, current_value, target_value, dt, alpha):
+            return _compute_kernel(static_kp, static_ki, static_kd, min_out, max_out, alpha, static_i_min,
+                                   static_i_max, min_d, max_d, max_rate, reset_delta,
+                                   state, current_value, target_value, dt)
+        return kernel
+
+    static_dt, static_alpha = sample_time, alpha
+
+    @njit(_SPECIALIZED_KERNEL_SIGNATURE, fastmath=True)
+    def kernel(kp, ki, kd, i_min, i_max, state, current_value, target_value, dt, alpha):
+        return _compute_kernel(static_kp, static_ki, static_kd, min_out, max_out, static_alpha, static_i_min,
+                               static_i_max, min_d, max_d, max_rate, reset_delta,
+                               state, current_value, target_value, static_dt)
+    return kernel
+
 
 class PID_Controller:
     """
@@ -17,178 +273,308 @@ class PID_Controller:
         min_output (float): Minimum output limit
         max_output (float): Maximum output limit
         tau (float): Derivative filter time constant (seconds)
+        sample_time (float): Expected fixed time step (seconds), precomputes the derivative filter factor
+        static_gains (bool): Gains and limits never change, compile a kernel specialized on them (see specialize)
     """
 
-    def __init__(self, kp: float, ki: float, kd: float, min_output: float, max_output: float, tau: float = 0.02, integrator_reset_delta: float = 1.0) -> None:
+    __slots__ = ('_kp', '_ki', '_kd', '_min_output', '_max_output', '_tau', '_sample_time', '_alpha',
+                 '_integrator_reset_delta', '_i_min', '_i_max', '_max_derivative', '_min_derivative',
+                 '_max_out_rate', '_state', '_last_time_ns', '_specialized', '_specialized_dt')
+
+    # specialize bakes the gains into the kernel, subclasses that tune them live turn this off
+    _specialize_gains = True
+
+    def __init__(self, kp: float, ki: float, kd: float, min_output: float, max_output: float, tau: float = 0.02, integrator_reset_delta: float = 1.0, sample_time: float = None, static_gains: bool = False) -> None:
+        # Stored as float so the kernels only ever see float64 arguments (no int recompiles)
         # PID coefficients
-        self._kp = kp
-        self._ki = ki
-        self._kd = kd
+        self._kp = float(kp)
+        self._ki = float(ki)
+        self._kd = float(kd)
 
         # Output limits
-        self._min_output = min_output
-        self._max_output = max_output
+        self._min_output = min_output = float(min_output)
+        self._max_output = max_output = float(max_output)
         
         # Derivative filter parameter
-        self._tau = tau  # Higher tau = more smoothing, less noise, slower response
+        self._tau = tau = float(tau)  # Higher tau = more smoothing, less noise, slower response
+
+        # Filter smoothing factor for the expected fixed time step
+        if sample_time is not None:
+            sample_time = float(sample_time)
+            self._alpha = tau / (tau + sample_time)
+        else:
+            self._alpha = None
+        self._sample_time = sample_time
         
-        self._integrator_reset_delta = integrator_reset_delta
-        # back calculation windup
-        self._k_aw = 0.90
+        self._integrator_reset_delta = float(integrator_reset_delta)
+        # integral limits against windup
+        self._update_integral_limits()
         
-        self._max_derivative = max_output * 0.2
-        self._min_derivative = min_output * 0.2
-        self._max_out_rate = (max_output - min_output) * 1.0
-
-        # Internal state
-        self._last_error = 0.0
-        self._last_time = time.time()
-        self._integral = 0.0
-        self._last_derivative = 0.0
-        self._last_value = 0.0
-        self._last_target = 0.0
-        self._last_output = 0.0
-        self._clamped = False
-
-    def compute(self, current_value: float, target_value: float) -> float:
+        self._max_derivative = max_output * _DERIVATIVE_LIMIT_RATIO
+        self._min_derivative = min_output * _DERIVATIVE_LIMIT_RATIO
+        self._max_out_rate = (max_output - min_output) * _OUT_RATE_RATIO
+
+        # Internal state, see the _S_* indices
+        if _PURE_PYTHON:
+            self._state = [0.0] * _STATE_SIZE
+        else:
+            self._state = np.zeros(_STATE_SIZE, dtype=np.float64)
+
+        # Warm up the kernel on scratch state so the first real tick doesn't pay the dispatch set-up
+        compute_pid(self._kp, self._ki, self._kd, min_output, max_output, tau / (tau + 1e-6),
+                    self._i_min, self._i_max, self._min_derivative, self._max_derivative,
+                    self._max_out_rate, self._integrator_reset_delta, self._state.copy(), 0.0, 0.0, 1e-6)
+
+        self._specialized = None
+        self._specialized_dt = None
+        if static_gains:
+            self.specialize()
+
+        # Start the clock only after warm-up, so JIT time isn't measured as the first dt
+        self._last_time_ns = time.monotonic_ns()
+
+    @property
+    def state(self) -> np.ndarray:
+        """
+        The live controller state array, updated in place by every compute call.
+
+        Holds ``[integral, last_derivative, last_value, last_target, last_output]``
+        (see the _S_* indices). All compute kernels, Python or compiled, read and
+        write this same buffer, so it can be handed to them without copies.
+        Without numba and without a compiled kernel it is a plain list of floats.
+        """
+        return self._state
+
+    def compute(self, current_value: float, target_value: float, dt: float = None,
+                _monotonic_ns=time.monotonic_ns, _kernel=compute_pid) -> float:  # _args: bound globals, don't pass
         """
         Compute the control command based on the current and target values.
 
         Args:
             current_value (float): The current process variable.
             target_value (float): The desired set point.
+            dt (float, optional): Time step since the last call (seconds). Pass it for
+                fixed rate loops to skip reading the clock, otherwise it is measured.
 
         Returns:
             float: The control command output.
         """
-        # Calculate time step
-        current_time = time.time()
-        dt = current_time - self._last_time
+        if dt is None:
+            # Calculate time step on the monotonic clock (immune to wall clock jumps)
+            now_ns = _monotonic_ns()
+            dt = (now_ns - self._last_time_ns) * 1e-9
+            self._last_time_ns = now_ns
         if dt <= 0.0:
             dt = 1e-6  # Avoid divide-by-zero errors
 
-        # Calculate error term
-        error = target_value - current_value
-        
+        if dt == self._sample_time:
+            alpha = self._alpha
+        else:
+            alpha = self._tau / (self._tau + dt)
 
-        # --- Proportional term ---
-        p_term = self._kp * error
+        # a kernel with the sample time baked in only covers ticks at that dt
+        if self._specialized is not None and (self._specialized_dt is None or dt == self._specialized_dt):
+            return self._specialized(self._kp, self._ki, self._kd, self._i_min, self._i_max,
+                                     self._state, current_value, target_value, dt, alpha)
 
-        # --- Integral term ---
-        
-        # reset integral if target has changed more then resetDelta
-        if abs(self._last_target - target_value) > self._integrator_reset_delta:
-            self._integral *= 0.5  # or = 0 for hard reset?
-        
-        # back calculation if min/max_output already reached to not integrate further
-        if not self._clamped:
-            self._integral += error * dt
-        i_term = self._ki * self._integral
+        output = _kernel(self._kp, self._ki, self._kd, self._min_output, self._max_output,
+                         alpha, self._i_min, self._i_max, self._min_derivative, self._max_derivative,
+                         self._max_out_rate, self._integrator_reset_delta,
+                         self._state, current_value, target_value, dt)
 
-        # --- Derivative term (with low-pass filter) ---
-        
-        # derivative on measurement
-        derivative = -(current_value - self._last_value) / dt
-        # derivative = (error - self._last_error) / dt  # spikes on target_value change
+        return output
 
-        # Filter derivative
-        filtered_derivative = self._filter_derivative(derivative, dt)
-        
-        # clamp derivative protect noise / glitches
-        clamped_derivative = max(self._min_derivative, min(filtered_derivative, self._max_derivative))
+    @staticmethod
+    def compute_many(controllers_state: np.ndarray, gains: np.ndarray, current: np.ndarray,
+                     target: np.ndarray, dt: float, integrator_reset_delta: float = 1.0) -> np.ndarray:
+        """
+        Compute one step for N independent controllers at once (MIMO / multi-loop control).
+
+        Same math as compute, evaluated with NumPy array operations instead of one
+        method call per controller. The per call overhead only pays off for larger
+        N (roughly 32 and up), for a few loops use one PID_Controller each.
+
+        Args:
+            controllers_state (np.ndarray): ``(N, _STATE_SIZE)`` float64 state, one row per
+                controller in the layout of PID_Controller.state. Updated in place.
+            gains (np.ndarray): ``(N, 6)`` rows of ``(kp, ki, kd, min_output, max_output, tau)``.
+            current (np.ndarray): ``(N,)`` current process variables.
+            target (np.ndarray): ``(N,)`` desired set points.
+            dt (float): Time step since the last call (seconds).
+            integrator_reset_delta (float): Target change that halves the integral.
+
+        Returns:
+            np.ndarray: ``(N,)`` control command outputs.
+
+        Raises:
+            ValueError: If controllers_state or gains don't have the shapes above.
+        """
+        state = controllers_state
+        if state.ndim != 2 or state.shape[1] != _STATE_SIZE:
+            raise ValueError(f"controllers_state must have shape (N, {_STATE_SIZE}), got {state.shape}")
+        if gains.shape != (state.shape[0], 6):
+            raise ValueError(f"gains must have shape ({state.shape[0]}, 6), got {gains.shape}")
+        kp, ki, kd, min_out, max_out, tau = gains.T
+        if dt <= 0.0:
+            dt = 1e-6  # Avoid divide-by-zero errors
+
+        # Calculate error term
+        error = target - current
+
+        # --- Integral term ---
+
+        # reset integral if target has changed more then resetDelta, then clamp (anti-windup)
+        integral = state[:, _S_INTEGRAL]
+        integral = np.where(np.abs(state[:, _S_LAST_TARGET] - target) > integrator_reset_delta,
+                            integral * 0.5, integral)
+        ki_safe = np.maximum(ki, 1e-12)
+        integral = np.clip(integral + error * dt, min_out / ki_safe, max_out / ki_safe)
 
-        d_term = self._kd * clamped_derivative
+        # --- Derivative term (with low-pass filter) ---
+        derivative = -(current - state[:, _S_LAST_VALUE]) / dt
+        alpha = tau / (tau + dt)
+        filtered_derivative = alpha * state[:, _S_LAST_DERIVATIVE] + (1 - alpha) * derivative
 
-        # Total PID output
-        output = p_term + i_term + d_term
+        # Total PID output, derivative clamped to protect against noise / glitches
+        min_d, max_d = min_out * _DERIVATIVE_LIMIT_RATIO, max_out * _DERIVATIVE_LIMIT_RATIO
+        output = kp * error + ki * integral + kd * np.clip(filtered_derivative, min_d, max_d)
 
         # Clamp the output within limits
-        clamped_output = self._apply_clamping(output, error)
-        if self._clamped:
-            self._integral -= (output -clamped_output) * self._k_aw *dt
-            
+        output = np.clip(output, min_out, max_out)
+
         # slew rate limiting
-        delta_output = clamped_output - self._last_output
-        if abs(delta_output) / dt > self._max_out_rate:
-            clamped_output = self._last_output + math.copysign(self._max_out_rate * dt, delta_output)    
+        last_output = state[:, _S_LAST_OUTPUT]
+        max_rate = (max_out - min_out) * _OUT_RATE_RATIO
+        output = last_output + np.clip((output - last_output) / dt, -max_rate, max_rate) * dt
 
         # Update internal state
-        self._last_error = error
-        self._last_time = current_time
-        self._last_derivative = derivative
-        self._last_value = current_value
-        self._last_target = target_value
-        self._last_output = clamped_output
+        state[:, _S_INTEGRAL] = integral
+        state[:, _S_LAST_DERIVATIVE] = filtered_derivative
+        state[:, _S_LAST_VALUE] = current
+        state[:, _S_LAST_TARGET] = target
+        state[:, _S_LAST_OUTPUT] = output
 
-        return clamped_output
+        return output
 
-    def _apply_clamping(self, output: float, error: float) -> float:
+    def specialize(self) -> None:
         """
-        Clamp the PID output to the configured limits.
-        This will ensure that our integrator doesn't windup
-
-        Args:
-            output (float): The raw PID output.
-            error (float): The current error (for anti-windup logic).
+        Compile a kernel specialized on the current gains, output, derivative and rate
+        limits, integrator reset delta and, with a sample_time, the time step and filter
+        factor, and use it in compute. Call again after changing any of them.
 
-        Returns:
-            float: The clamped PID output.
+        Subclasses with _specialize_gains off (AdaptivePID) keep the gains and the
+        sample time as kernel arguments, so tuning never needs a rebuild.
+        Kernels are cached on their constants, equal controllers compile once.
         """
-        clamped_output = max(self._min_output, min(self._max_output, output))
+        gains = sample_time = alpha = None
+        if self._specialize_gains:
+            gains = (self._kp, self._ki, self._kd, self._i_min, self._i_max)
+            sample_time, alpha = self._sample_time, self._alpha
 
-        # Check if we hit the limit (for anti-windup)
-        self._clamped = math.copysign(1, clamped_output) == math.copysign(1, error) and (
-            clamped_output == self._min_output or clamped_output == self._max_output
-        )
+        self._specialized = _build_specialized_kernel(
+            self._min_output, self._max_output, self._min_derivative, self._max_derivative,
+            self._max_out_rate, self._integrator_reset_delta, gains, sample_time, alpha)
+        self._specialized_dt = sample_time
 
-        return clamped_output
+        # Warm up on scratch state so the first real tick doesn't pay the dispatch set-up
+        self._specialized(self._kp, self._ki, self._kd, self._i_min, self._i_max,
+                          self._state.copy(), 0.0, 0.0, 1e-6, 0.0)
 
-    def _filter_derivative(self, raw_derivative: float, dt: float) -> float:
+    def _update_integral_limits(self) -> None:
         """
-        Apply a first-order low-pass filter to the derivative term.
+        Recompute the integral limits so ki * integral stays within the output limits.
+        Call after changing ki.
+        """
+        self._i_max = self._max_output / max(self._ki, 1e-12)
+        self._i_min = self._min_output / max(self._ki, 1e-12)
+
+    def simulate_batch(self, kps, kis, kds, targets, dt: float, n_steps: int, plant_fn, initial_value: float = 0.0):
+        """
+        Simulate N closed loop rollouts with different gains, e.g. for tuning sweeps.
+
+        Every rollout uses the limits and filter settings of this controller and
+        starts from a fresh internal state. The controller itself is not modified.
 
         Args:
-            raw_derivative (float): The unfiltered derivative value.
-            dt (float): Time step since last update.
+            kps, kis, kds (array_like): Gains, one entry per rollout (or a single value for all).
+            targets (array_like): Set point per rollout (or a single value for all).
+            dt (float): Simulation step size (seconds).
+            n_steps (int): Number of steps per rollout.
+            plant_fn (callable): ``plant_fn(value, command, dt) -> new value`` process model.
+                Must be decorated with ``numba.njit`` when numba is installed.
+            initial_value (float): Initial process value of every rollout.
 
         Returns:
-            float: Filtered derivative value.
+            tuple: ``(values, commands)`` arrays of shape ``(N, n_steps)``.
+
+        Raises:
+            ValueError: If the gain and target arrays can't be broadcast to one 1-D shape,
+                or if dt is not positive.
         """
-        # Compute the smoothing factor (alpha)
-        alpha = self._tau / (self._tau + dt)
+        if not dt > 0.0:
+            raise ValueError(f"dt must be positive, got {dt}")
 
-        # Apply exponential smoothing
-        filtered_derivative = (alpha * self._last_derivative + (1 - alpha) * raw_derivative)
-        
-        return filtered_derivative
+        # the kernel does no bounds checking, so bring all per rollout inputs to one length
+        kps, kis, kds, targets = (
+            np.ascontiguousarray(arr) for arr in np.broadcast_arrays(
+                *(np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in (kps, kis, kds, targets)))
+        )
+        if kps.ndim != 1:
+            raise ValueError("kps, kis, kds and targets must be scalars or 1-D arrays")
+
+        return _simulate_batch_kernel(kps, kis, kds, targets, float(self._min_output), float(self._max_output),
+                                      float(self._tau), float(self._min_derivative),
+                                      float(self._max_derivative), float(self._max_out_rate),
+                                      float(self._integrator_reset_delta), float(initial_value),
+                                      float(dt), int(n_steps), plant_fn)
     
 
 # Test simulation
 if __name__ == "__main__":
+    import argparse
     import random
-    # Example PID tuning (adjust as needed)
-    pid = PID_Controller(kp=1.2, ki=0.3, kd=0.05, min_output=-100, max_output=100, tau=0.05)
+    parser = argparse.ArgumentParser(description="PID simulation")
+    parser.add_argument("--realtime", action="store_true", help="sleep dt per step and let the controller measure time")
+    parser.add_argument("--repeat", type=int, default=1, help="run the simulation N times and report the fastest loop")
+    args = parser.parse_args()
 
     target = 10.0   # Desired set point
-    process_value = 0.0  # Initial system value
     dt = 0.05       # Simulation step size (seconds)
+    n_steps = 1600
+    step_dt = None if args.realtime else dt  # None = measured by the controller
+
+    # Preallocated log, printed after the loop so formatting isn't measured
+    log = np.empty((n_steps, 4))
 
     print("Starting PID simulation...\n")
-    print(f"{'Time':>6} | {'Target':>7} | {'Value':>7} | {'Command':>8}")
 
-    for step in range(1600):
-        # Compute control output
-        command = pid.compute(process_value, target)
+    loop_times = []
+    for _ in range(max(args.repeat, 1)):
+        # Example PID tuning (adjust as needed)
+        pid = PID_Controller(kp=1.2, ki=0.3, kd=0.05, min_output=-100, max_output=100, tau=0.05)
+        process_value = 0.0  # Initial system value
 
-        # Simulate a simple process: the command changes the process_value
-        # The process has some inertia (slow response) and random noise
-        process_value += 0.1 * command * dt
-        process_value += random.uniform(-0.02, 0.02)  # Add small noise
+        start = time.perf_counter()
+        for step in range(n_steps):
+            # Compute control output
+            command = pid.compute(process_value, target, step_dt)
 
-        # Print every few steps
-        if step % 10 == 0:
-            print(f"{step*dt:6.2f} | {target:7.2f} | {process_value:7.2f} | {command:8.2f}")
+            # Simulate a simple process: the command changes the process_value
+            # The process has some inertia (slow response) and random noise
+            process_value += 0.1 * command * dt
+            process_value += random.uniform(-0.02, 0.02)  # Add small noise
 
-        time.sleep(dt)  # Simulate real-time delay
+            log[step] = (step * dt, target, process_value, command)
+
+            if args.realtime:
+                time.sleep(dt)  # Simulate real-time delay
+        loop_times.append(time.perf_counter() - start)
+
+    # Print every few steps
+    print(f"{'Time':>6} | {'Target':>7} | {'Value':>7} | {'Command':>8}")
+    for t, target_value, value, command in log[::10]:
+        print(f"{t:6.2f} | {target_value:7.2f} | {value:7.2f} | {command:8.2f}")
 
-    print("\nSimulation complete.")
\ No newline at end of file
+    best = min(loop_times)
+    print(f"\nSimulation complete. Loop time: {best * 1e3:.3f} ms "
+          f"({best / n_steps * 1e6:.3f} us per step, best of {len(loop_times)})")
\ No newline at end of file
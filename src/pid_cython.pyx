@@ -0,0 +1,72 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Cython build of the PID compute kernel for environments without numba.
+
+Mirrors _compute_kernel in pid_controller.py with statically typed doubles,
+so the arithmetic compiles to plain C without Python number dispatch.
+Build with ``python build_pid_cython.py build_ext --inplace``.
+"""
+from libc.math cimport fabs, fmin, fmax
+
+# Layout of the controller state array, must match the _S_* indices in pid_controller.py
+cdef enum:
+    _S_INTEGRAL = 0
+    _S_LAST_DERIVATIVE = 1
+    _S_LAST_VALUE = 2
+    _S_LAST_TARGET = 3
+    _S_LAST_OUTPUT = 4
+
+
+cpdef long kernel_version():
+    """Must match _KERNEL_VERSION in pid_controller.py."""
+    return 1
+
+
+cpdef double compute_pid(double kp, double ki, double kd, double min_out, double max_out, double alpha,
+                         double i_min, double i_max, double min_d, double max_d, double max_rate,
+                         double reset_delta, double[::1] state, double current_value,
+                         double target_value, double dt):
+    """
+    Compute one PID step and update the state array in place.
+    Same arguments and result as pid_controller._compute_kernel.
+    """
+    cdef double error, integral, derivative, filtered_derivative, output, clamped_output, rate
+    cdef double last_output = state[_S_LAST_OUTPUT]
+
+    # Calculate error term
+    error = target_value - current_value
+
+    # --- Integral term ---
+
+    # reset integral if target has changed more then resetDelta
+    integral = state[_S_INTEGRAL]
+    if fabs(state[_S_LAST_TARGET] - target_value) > reset_delta:
+        integral *= 0.5
+
+    # clamp the integral so the i term alone can't exceed the output limits (anti-windup)
+    integral = fmin(fmax(integral + error * dt, i_min), i_max)
+
+    # --- Derivative term (with low-pass filter) ---
+
+    # derivative on measurement, filtered with a first-order low-pass (exponential smoothing)
+    derivative = -(current_value - state[_S_LAST_VALUE]) / dt
+    filtered_derivative = alpha * state[_S_LAST_DERIVATIVE] + (1 - alpha) * derivative
+
+    # Total PID output, derivative clamped to protect against noise / glitches
+    output = kp * error + ki * integral + kd * fmin(fmax(filtered_derivative, min_d), max_d)
+
+    # Clamp the output within limits
+    clamped_output = fmin(fmax(output, min_out), max_out)
+
+    # slew rate limiting
+    rate = (clamped_output - last_output) / dt
+    clamped_output = last_output + fmin(fmax(rate, -max_rate), max_rate) * dt
+
+    # Update internal state
+    state[_S_INTEGRAL] = integral
+    state[_S_LAST_DERIVATIVE] = filtered_derivative
+    state[_S_LAST_VALUE] = current_value
+    state[_S_LAST_TARGET] = target_value
+    state[_S_LAST_OUTPUT] = clamped_output
+
+    return clamped_output
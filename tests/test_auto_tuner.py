@@ -0,0 +1,63 @@
+"""
+AdaptivePID._auto_tune against gain updates worked out by hand.
+"""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pid_controller  # noqa: E402
+
+# autoTuner imports the controller through the package path of the repository checkout
+for name in ('PythonPID', 'PythonPID.src'):
+    sys.modules.setdefault(name, types.ModuleType(name))
+sys.modules.setdefault('PythonPID.src.pid_controller', pid_controller)
+
+from autoTuner import AdaptivePID  # noqa: E402
+
+
+def make_pid():
+    return AdaptivePID(kp=1.0, ki=0.5, kd=0.1, min_output=-10.0, max_output=10.0,
+                       tune_rate=0.01, error_threshold=0.05)
+
+
+def test_error_sign_changes_are_counted():
+    pid = make_pid()
+
+    # errors +1, -1, 0, +1: zero counts as positive, so only the first two flips count
+    for current, sign in ((0.0, True), (2.0, False), (1.0, True), (0.0, True)):
+        pid._auto_tune(current, 1.0)
+        assert pid._prev_error_pos is sign
+    assert pid._oscillation_counter == 2
+
+
+def test_large_error_raises_kp():
+    pid = make_pid()
+
+    # error 2 is above the threshold: kp += 0.01 * 2, the other gains stay
+    pid._auto_tune(0.0, 2.0)
+    assert (pid._kp, pid._ki, pid._kd) == pytest.approx((1.02, 0.5, 0.1))
+
+
+def test_small_error_raises_ki_and_its_integral_limits():
+    pid = make_pid()
+
+    # error 0.01 is within the threshold: ki += 0.01 * 0.001 and the clamp follows
+    pid._auto_tune(1.0, 1.01)
+    assert (pid._kp, pid._ki, pid._kd) == pytest.approx((1.0, 0.50001, 0.1))
+    assert (pid._i_min, pid._i_max) == pytest.approx((-10.0 / 0.50001, 10.0 / 0.50001))
+
+
+def test_oscillation_backs_off_kp_and_raises_kd():
+    pid = make_pid()
+
+    # small errors of alternating sign: the 4th flip (5th call) trips the counter
+    for step in range(5):
+        pid._auto_tune(1.0, 1.0 + (0.01 if step % 2 == 0 else -0.01))
+    assert pid._kp == pytest.approx(0.95)
+    assert pid._kd == pytest.approx(0.101)
+    assert pid._ki == pytest.approx(0.50005)
+    assert pid._oscillation_counter == 0
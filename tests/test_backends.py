@@ -0,0 +1,121 @@
+"""
+The PID math exists in several backends (numba/Python kernel, AOT and Cython
+builds, the specialized kernels, compute_many and the batch kernel).
+Run the same closed loop through every available one and check they agree.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pid_controller  # noqa: E402
+from pid_controller import PID_Controller, njit  # noqa: E402
+
+KP, KI, KD = 1.2, 1.0, 0.05
+MIN_OUT, MAX_OUT, TAU = -40.0, 40.0, 0.05
+DT = 0.05
+N_STEPS = 500
+
+
+def plant(value, command, dt):
+    return value + command * dt
+
+
+def target_at(step):
+    # every limit gets hit: set point jumps reset the integral, the large ones saturate the output
+    # and wind the integral up to both clamps, the derivative and slew limits trip along the way
+    return (10.0, 12.0, 60.0, -60.0, 10.0)[5 * step // N_STEPS]
+
+
+def run_loop(step_fn, target_fn=target_at):
+    value = 0.0
+    commands = np.empty(N_STEPS)
+    for step in range(N_STEPS):
+        commands[step] = step_fn(value, target_fn(step))
+        value = plant(value, commands[step], DT)
+    return commands
+
+
+def kernel_step_fn(kernel):
+    pid = PID_Controller(KP, KI, KD, MIN_OUT, MAX_OUT, tau=TAU)
+    state = np.zeros_like(pid.state)
+    alpha = TAU / (TAU + DT)
+
+    def step(value, target):
+        return kernel(pid._kp, pid._ki, pid._kd, pid._min_output, pid._max_output, alpha, pid._i_min, pid._i_max,
+                      pid._min_derivative, pid._max_derivative, pid._max_out_rate, pid._integrator_reset_delta,
+                      state, value, target, DT)
+    return step
+
+
+def scalar_backends():
+    backends = {'compute_kernel': pid_controller._compute_kernel}
+    py_func = getattr(pid_controller._compute_kernel, 'py_func', None)
+    if py_func is not None:
+        backends['python'] = py_func
+    for name in ('pid_ext', 'pid_cython'):
+        kernel = pid_controller._import_compiled_kernel(name)
+        if kernel is not None:
+            backends[name] = kernel
+    return backends
+
+
+@pytest.fixture(scope='module')
+def reference():
+    pid = PID_Controller(KP, KI, KD, MIN_OUT, MAX_OUT, tau=TAU)
+    return run_loop(lambda value, target: pid.compute(value, target, DT))
+
+
+@pytest.mark.parametrize('name', sorted(scalar_backends()))
+def test_scalar_kernels_match(name, reference):
+    commands = run_loop(kernel_step_fn(scalar_backends()[name]))
+    np.testing.assert_allclose(commands, reference, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('sample_time', [None, DT])
+def test_specialized_kernel_matches(reference, sample_time):
+    pid = PID_Controller(KP, KI, KD, MIN_OUT, MAX_OUT, tau=TAU, sample_time=sample_time, static_gains=True)
+    commands = run_loop(lambda value, target: pid.compute(value, target, DT))
+    np.testing.assert_allclose(commands, reference, rtol=1e-9, atol=1e-9)
+
+
+def test_specialized_kernel_without_integral_matches():
+    plain = PID_Controller(KP, 0.0, KD, MIN_OUT, MAX_OUT, tau=TAU)
+    pid = PID_Controller(KP, 0.0, KD, MIN_OUT, MAX_OUT, tau=TAU, static_gains=True)
+    expected = run_loop(lambda value, target: plain.compute(value, target, DT))
+    commands = run_loop(lambda value, target: pid.compute(value, target, DT))
+    np.testing.assert_allclose(commands, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_specialized_limits_kernel_matches(reference):
+    class TunedLive(PID_Controller):
+        __slots__ = ()
+        _specialize_gains = False
+
+    pid = TunedLive(KP, KI, KD, MIN_OUT, MAX_OUT, tau=TAU, static_gains=True)
+    commands = run_loop(lambda value, target: pid.compute(value, target, DT))
+    np.testing.assert_allclose(commands, reference, rtol=1e-9, atol=1e-9)
+
+
+def test_compute_many_matches(reference):
+    gains = np.array([[KP, KI, KD, MIN_OUT, MAX_OUT, TAU]] * 3)
+    state = np.zeros((3, len(PID_Controller(KP, KI, KD, MIN_OUT, MAX_OUT).state)))
+    values = np.zeros(3)
+    for step in range(N_STEPS):
+        commands = PID_Controller.compute_many(state, gains, values, np.full(3, target_at(step)), DT)
+        np.testing.assert_allclose(commands, reference[step], rtol=1e-9, atol=1e-9)
+        values = plant(values, commands, DT)
+
+
+def test_simulate_batch_matches():
+    kps, kis, kds = np.array([KP, 2.0]), np.array([KI, 0.1]), np.array([KD, 0.0])
+    pid = PID_Controller(KP, KI, KD, MIN_OUT, MAX_OUT, tau=TAU)
+    _, commands = pid.simulate_batch(kps, kis, kds, 60.0, DT, N_STEPS, njit(plant))
+
+    for i in range(kps.size):
+        single = PID_Controller(kps[i], kis[i], kds[i], MIN_OUT, MAX_OUT, tau=TAU)
+        expected = run_loop(lambda value, target: single.compute(value, target, DT), lambda step: 60.0)
+        np.testing.assert_allclose(commands[i], expected, rtol=1e-9, atol=1e-9)
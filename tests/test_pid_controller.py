@@ -0,0 +1,84 @@
+"""
+PID_Controller.compute against values worked out by hand for single ticks.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pid_controller import _S_INTEGRAL, _S_LAST_DERIVATIVE, PID_Controller  # noqa: E402
+
+
+def test_caller_dt_is_used_without_reading_the_clock():
+    pid = PID_Controller(kp=2.0, ki=0.5, kd=0.0, min_output=-100.0, max_output=100.0)
+    last_time_ns = pid._last_time_ns
+
+    # error 2: p = 2 * 2, integral = 2 * 0.1, i = 0.5 * 0.2
+    assert pid.compute(1.0, 3.0, dt=0.1) == pytest.approx(4.1)
+    assert pid.state[_S_INTEGRAL] == pytest.approx(0.2)
+    assert pid._last_time_ns == last_time_ns
+
+
+def test_non_positive_dt_falls_back_to_one_microsecond():
+    pid = PID_Controller(kp=2.0, ki=0.5, kd=0.0, min_output=-100.0, max_output=100.0)
+
+    # the slew limit (max_output - min_output) / s allows 200 * 1e-6 from the initial output 0
+    assert pid.compute(1.0, 3.0, dt=0.0) == pytest.approx(2e-4)
+    assert pid.state[_S_INTEGRAL] == pytest.approx(2e-6)
+
+
+def test_sample_time_caches_the_filter_factor():
+    pid = PID_Controller(kp=0.0, ki=0.0, kd=1.0, min_output=-1000.0, max_output=1000.0, tau=0.05, sample_time=0.05)
+    assert pid._alpha == pytest.approx(0.5)
+
+    # derivative -(1 - 0) / 0.05 = -20, filtered with alpha 0.5
+    assert pid.compute(1.0, 0.0, dt=0.05) == pytest.approx(-10.0)
+
+
+def test_other_dt_recomputes_the_filter_factor():
+    pid = PID_Controller(kp=0.0, ki=0.0, kd=1.0, min_output=-1000.0, max_output=1000.0, tau=0.05, sample_time=0.05)
+
+    # alpha 0.05 / (0.05 + 0.15) = 0.25, derivative -1 / 0.15, filtered 0.75 * -6.67
+    assert pid.compute(1.0, 0.0, dt=0.15) == pytest.approx(-5.0)
+
+
+def test_integral_is_clamped_to_the_output_limits():
+    pid = PID_Controller(kp=0.0, ki=2.0, kd=0.0, min_output=-10.0, max_output=10.0)
+    assert (pid._i_min, pid._i_max) == pytest.approx((-5.0, 5.0))
+
+    # error 10 per 1 s tick would wind the integral up to 30, the clamp stops it at 10 / 2
+    for _ in range(3):
+        output = pid.compute(0.0, 10.0, dt=1.0)
+    assert output == pytest.approx(10.0)
+    assert pid.state[_S_INTEGRAL] == pytest.approx(5.0)
+
+    # a larger ki tightens the clamp to 10 / 4 once the limits are updated
+    pid._ki = 4.0
+    pid._update_integral_limits()
+    assert (pid._i_min, pid._i_max) == pytest.approx((-2.5, 2.5))
+    pid.compute(0.0, 10.0, dt=1.0)
+    assert pid.state[_S_INTEGRAL] == pytest.approx(2.5)
+
+
+def test_dt_is_measured_on_the_monotonic_clock():
+    pid = PID_Controller(kp=2.0, ki=0.5, kd=0.0, min_output=-100.0, max_output=100.0)
+    pid._last_time_ns = 5_000_000_000
+
+    # 100 ms later on the injected clock: same tick as dt=0.1
+    assert pid.compute(1.0, 3.0, _monotonic_ns=lambda: 5_100_000_000) == pytest.approx(4.1)
+    assert pid.state[_S_INTEGRAL] == pytest.approx(0.2)
+    assert pid._last_time_ns == 5_100_000_000
+
+
+def test_filter_feeds_back_the_filtered_derivative():
+    pid = PID_Controller(kp=0.0, ki=0.0, kd=1.0, min_output=-1000.0, max_output=1000.0, tau=0.05)
+
+    # alpha 0.5: the raw -20 from the step is stored filtered as -10 ...
+    assert pid.compute(1.0, 0.0, dt=0.05) == pytest.approx(-10.0)
+    assert pid.state[_S_LAST_DERIVATIVE] == pytest.approx(-10.0)
+
+    # ... and decays by alpha once the value stops moving (feeding back the raw -20 would give -10)
+    assert pid.compute(1.0, 0.0, dt=0.05) == pytest.approx(-5.0)
+    assert pid.state[_S_LAST_DERIVATIVE] == pytest.approx(-5.0)